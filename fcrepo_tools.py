@@ -1,7 +1,9 @@
 import json
 import logging
 import os
+import re
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime as dt
 from pathlib import Path
 from typing import List
@@ -10,7 +12,8 @@ import click
 import requests
 from pyoxigraph import NamedNode, RdfFormat, Store, parse, serialize
 from pythonjsonlogger.json import JsonFormatter
-from requests import HTTPError
+from requests import HTTPError, RequestException
+from requests.adapters import HTTPAdapter
 from yaml import Loader, load
 
 from pytools.fcrepo_to_bulkrax import FedoraGraph
@@ -21,14 +24,22 @@ from pytools.verify_migration import Fedora6Graph, MigrationDiff
 logging.basicConfig()
 logging.getLogger().setLevel(logging.INFO)
 
+LDP_CONTAINS = NamedNode("http://www.w3.org/ns/ldp#contains")
+PROD_ROOT = NamedNode("http://localhost:8984/rest/prod")
+PREFIX_RE = re.compile(r"^@prefix\s+(\S*):\s+<([^>]*)>")
 
-def delete_object(session, uri):
+
+def delete_object(session, uri, timeout=30):
     try:
-        r = session.delete(uri)
+        # Time out, so that a stalled request doesn't hold up one of the worker threads indefinitely
+        r = session.delete(uri, timeout=timeout)
         if r.status_code != 204:
             r.raise_for_status()
     except HTTPError:
         logging.error(f"Error deleting {uri}: {r.text}")
+    except RequestException as e:
+        # Log timeouts and connection errors, rather than letting them stop the remaining deletes
+        logging.error(f"Error deleting {uri}: {e}")
 
 
 @click.group()
@@ -60,8 +71,13 @@ def rsync_ocfl(remote_path, local_path, rsync):
         remote_path,
         local_path,
     ]
-    completed = subprocess.run(command, capture_output=True, text=True)
-    if completed.returncode == 0:
+    # Stream rsync's output, rather than capturing it all in memory
+    with subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    ) as proc:
+        for line in proc.stdout:
+            logging.info(line.rstrip())
+    if proc.returncode == 0:
         print("Rsync completed successfully.")
 
 
@@ -70,33 +86,32 @@ def rsync_ocfl(remote_path, local_path, rsync):
 def remove_audits(ttl):
     logging.info("Removing all child notes except rest/prod")
     g = parse(path=ttl)
-    # Derive prefixes from original TTL file
+    # Derive prefixes from original TTL file, reading it line by line
     with open(ttl) as f:
-        rdf = f.read()
-    prefixes = [r for r in rdf.split("\n") if r.startswith("@prefix")]
-    prefix_dict = {}
-    for prefix in prefixes:
-        p = prefix.split()
-        prefix_dict[p[1][:-1]] = p[2][1:-1]
+        prefix_dict = dict(m.groups() for line in f if (m := PREFIX_RE.match(line)))
     # Remove every child except the prod object
-    keep = [
+    keep = (
         node
         for node in g
-        if not (
-            node.predicate == NamedNode("http://www.w3.org/ns/ldp#contains")
-            and node.object != NamedNode("http://localhost:8984/rest/prod")
-        )
-    ]
-    # Save modified graph
-    serialize(input=keep, output=ttl, format=RdfFormat.TURTLE, prefixes=prefix_dict)
+        if not (node.predicate == LDP_CONTAINS and node.object != PROD_ROOT)
+    )
+    # Save modified graph, streaming to a temporary file since the original is still being parsed
+    tmp_ttl = f"{ttl}.tmp"
+    serialize(input=keep, output=tmp_ttl, format=RdfFormat.TURTLE, prefixes=prefix_dict)
+    os.replace(tmp_ttl, ttl)
 
 
 @main.command()
 @click.option("--root", help="Root path to repository files.")
 @click.option("--output", help="Path for saving RDF store.")
-def parse_graph(root: str, output: str):
+@click.option(
+    "--workers",
+    default=1,
+    help="Number of files to load concurrently. Each load also uses several threads of its own.",
+)
+def parse_graph(root: str, output: str, workers: int):
     g = GraphPart([root], output)
-    g.walk()
+    g.walk(max_workers=workers)
     logging.info("Saving graph.")
 
 
@@ -105,16 +120,25 @@ def parse_graph(root: str, output: str):
     "--objects",
     help="Path to text file containing list of objects to remove, one URI per line.",
 )
-def remove_orphans(objects):
+@click.option(
+    "--workers", default=32, help="Number of DELETE requests to issue concurrently."
+)
+def remove_orphans(objects, workers):
     with open(objects) as f:
-        uris = [r.strip() for r in f]
+        # Replace the localhost with the base URI of the host network
+        uris = [r.strip().replace("localhost", "127.0.0.1") for r in f if r.strip()]
     session = requests.Session()
-    for uri in uris:
-        if uri:
-            # Replace the localhost with the base URI of the host network
-            uri = uri.replace("localhost", "127.0.0.1")
-            logging.info(f"Deleting object {uri}")
-            delete_object(session, uri)
+    # Size the connection pool to match the number of threads sharing the session
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def _delete(uri):
+        logging.info(f"Deleting object {uri}")
+        delete_object(session, uri)
+
+    with ThreadPoolExecutor(max_workers=workers) as exe:
+        list(exe.map(_delete, uris))
 
 
 @main.command()
@@ -143,8 +167,8 @@ def extract_to_bulkrax(config, admin_set, dry_run):
         )
         handler.setFormatter(JsonFormatter())
         logger.addHandler(handler)
-    graph = FedoraGraph(**options)
-    graph.prepare_imports()
+    with FedoraGraph(**options) as graph:
+        graph.prepare_imports()
 
 
 @main.command()
@@ -1,15 +1,19 @@
+import csv
 import logging
-from collections import Counter
+import os
+import pickle
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from csv import DictReader, DictWriter
 from datetime import datetime
-from io import StringIO
-from itertools import chain, groupby
+from hashlib import blake2b
+from itertools import chain
 from pathlib import Path
 from typing import Dict, Iterator, List, Optional, Tuple
 from zipfile import ZipFile
 
 import jsonlines
-from more_itertools import before_and_after
 from pyoxigraph import Store
 
 from pytools.mappings import *
@@ -19,6 +23,10 @@ from pytools.utils import *
 
 logger = logging.getLogger(__name__)
 
+# Joiners for multi-valued fields in the Bulkrax CSV
+_pipe_join = "|".join
+_semicolon_join = "; ".join
+
 
 class ChangeSet:
     """For updating specific fields during migration."""
@@ -61,6 +69,101 @@ class FedoraGraph:
     MEMBERSHIP_CHILD = "http://pcdm.org/models#memberOf"
     # MEMBERSHIP_PARENT = "http://pcdm.org/models#hasMember"
 
+    # SPARQL queries are defined once for the class
+    # The resource and fileset queries are templates, filled in with the models and admin set criteria
+    RESOURCES_QUERY = """
+        prefix fedora: <info:fedora/fedora-system:def/model#>
+        prefix pcdm: <http://pcdm.org/models#>
+        prefix partOf: <http://purl.org/dc/terms/isPartOf>
+        prefix title: <http://purl.org/dc/terms/title>
+
+        select distinct ?s ?p ?o ?adminSet
+        where {{
+           # Most selective patterns first: resources of the given models, then their admin set, then their triples
+           values ?model {{ {models} }}
+           ?s fedora:hasModel ?model.
+           values ?adminSetModel {{ "AdminSet" }}
+           {admin_set_values}
+           {admin_set_criteria}
+           values ?p {{ {predicates} }}
+           {{ ?s ?p ?o. }}
+           {parents_union}
+        }}
+    """
+    FILESETS_QUERY = """
+      prefix fedora: <info:fedora/fedora-system:def/model#>
+      PREFIX fedora_repo: <http://fedora.info/definitions/v4/repository#>
+      prefix ns: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+      prefix pcdm: <http://pcdm.org/models#>
+      prefix partOf: <http://purl.org/dc/terms/isPartOf>
+      prefix title: <http://purl.org/dc/terms/title>
+
+      select distinct (?s as ?work) (?fs as ?fileset) (?fn as ?filename) (?fu as ?file_uri)
+      where {{
+            {admin_set_values}
+            values ?model {{ {models} }}
+            ?s fedora:hasModel ?model.
+            ?s pcdm:hasMember ?fs.
+            ?fs ns:type <http://projecthydra.org/works/models#FileSet>.
+            ?fs fedora:downloadFilename ?fn.
+            ?fs pcdm:hasFile ?fu.
+            ?fu ns:type <http://pcdm.org/use#OriginalFile>.
+            {admin_set_criteria}
+        }}
+    """
+    # Parent works and collections link to child works with pcdm:hasMember
+    # Binding these as pcdm:memberOf (MEMBERSHIP_CHILD) lets the works query return each work's parents with its own triples
+    PARENTS_UNION = """
+           union {
+              ?o pcdm:hasMember ?s.
+              filter (?o != <http://localhost:8984/rest/prod>)
+              bind (pcdm:memberOf as ?p)
+           }
+    """
+    # Permissions and embargoes are fetched together, each row tagged with its kind
+    ATTRIBUTES_QUERY = """
+        prefix fedoraModel: <info:fedora/fedora-system:def/model#>
+        prefix acl: <http://www.w3.org/ns/auth/acl#>
+        prefix hydra_acl: <http://projecthydra.org/ns/auth/acl#>
+
+        select ?kind ?resource ?groupRank ?visibilityDuringEmbargo ?visibilityAfterEmbargo ?releaseDate
+        where {
+            {
+                {
+                    select ?resource (max(?rank) as ?groupRank)
+                    where {
+                        ?s fedoraModel:hasModel "Hydra::AccessControls::Permission".
+                        ?s acl:agent ?agent.
+                        ?s acl:accessTo ?resource.
+                        filter(contains(str(?agent), "group"))
+                        # Rank groups by precedence, indexing into PermissionsMapping.visibilities
+                        bind(
+                            if(strends(str(?agent), "#public"), 2,
+                                if(strends(str(?agent), "#registered"), 1, 0)
+                            ) as ?rank
+                        )
+                    }
+                    group by ?resource
+                }
+                bind("permission" as ?kind)
+            }
+            union
+            {
+                {
+                    select distinct ?resource ?visibilityDuringEmbargo ?visibilityAfterEmbargo ?releaseDate
+                    where {
+                        ?s fedoraModel:hasModel "Hydra::AccessControls::Embargo".
+                        ?s hydra_acl:embargoReleaseDate ?releaseDate.
+                        ?s hydra_acl:visibilityDuringEmbargo ?visibilityDuringEmbargo.
+                        ?s hydra_acl:visibilityAfterEmbargo ?visibilityAfterEmbargo.
+                        ?resource hydra_acl:hasEmbargo ?s.
+                    }
+                }
+                bind("embargo" as ?kind)
+            }
+        }
+    """
+
     def __init__(
         self,
         path_to_graph,
@@ -74,15 +177,42 @@ class FedoraGraph:
         field_defaults: Optional[Dict[str, str]] = None,
         batch_size: int = 50,
         dry_run: bool = False,
+        in_memory: bool = False,
+        query_cache: Optional[str] = None,
     ):
         """Provide a path to an Oxigraph RDF store, a path to a mapping of RDF predicates to Bulkrax fields, and a list satisfying the predicate info:fedora/fedora-system:def/model#hasModel for the types of works to be extracted.
         The mapping should be a CSV with headers "predicate" and "bulkrax_field".
-        The list of models may either be a list of strings or a comma-separated string."""
+        The list of models may either be a list of strings or a comma-separated string.
+        If in_memory is True, the graph is copied into an in-memory store before querying (for graphs that fit in RAM).
+        If a query_cache directory is provided, query results are saved there and reused by later runs against the same graph.
+        Cached results are pickled, so the query_cache directory must be one that only trusted users can write to."""
         try:
             self.store = Store.read_only(str(path_to_graph))
         except Exception as e:
             logger.error(f"Unable to load graph data from {path_to_graph}.", e)
             raise
+        if in_memory:
+            logger.info("Copying graph data into memory.")
+            on_disk = self.store
+            self.store = Store()
+            # Bulk insertion skips the transaction that extend would hold for the whole graph
+            self.store.bulk_extend(on_disk)
+            # pyoxigraph has no close method, so the on-disk store is released by dropping it
+            del on_disk
+        self.query_cache = None
+        if query_cache:
+            self.query_cache = Path(query_cache)
+            self.query_cache.mkdir(parents=True, exist_ok=True)
+            # Cached results are only valid for the graph as it was when they were saved,
+            # so they are keyed on its location and the name, size and mtime of each of its files
+            path_to_graph = Path(path_to_graph).resolve()
+            self.graph_fingerprint = "\n".join(
+                [str(path_to_graph)]
+                + [
+                    f"{p.name}:{p.stat().st_size}:{p.stat().st_mtime_ns}"
+                    for p in sorted(path_to_graph.iterdir())
+                ]
+            )
         self.admin_set = admin_set
         output_path = Path(output_path)
         if admin_set:
@@ -103,40 +233,91 @@ class FedoraGraph:
         # Add the predicate the connects child works to parents
         if FedoraGraph.MEMBERSHIP_CHILD not in self.mapping:
             self.mapping[FedoraGraph.MEMBERSHIP_CHILD] = ("parents", True)
+        # The mapped predicates restrict the resources query, so they are rendered once here
+        self.predicates = " ".join(f"<{predicate}>" for predicate in self.mapping)
         if isinstance(models, str):
             self.models = models.split(",")
         else:
             self.models = models
-        self.pipe_delimited = pipe_delimited if pipe_delimited else []
+        # Like the models, pipe-delimited fields may be a list or a comma-separated string
+        if isinstance(pipe_delimited, str):
+            pipe_delimited = pipe_delimited.split(",")
+        self.pipe_delimited = frozenset(pipe_delimited or [])
+        # Joiner for each multi-valued field that isn't semicolon-delimited, so formatting a row needs one lookup per field
+        self.joiners = {field: _pipe_join for field in self.pipe_delimited}
         if change_set:
             self.change_set = ChangeSet(change_set)
         # if field_defaults:
         self.field_defaults = field_defaults
         # Fedora graph data, URI's mapped to predicates
-        # Load permissions and embargo data on initialization
-        self.permissions = self.get_permissions()
-        self.embargos = self.get_embargos()
-        self.parents = self.get_parents()
+        # Embargoes are evaluated as of the time the migration starts
+        self.now = datetime.now()
+        # Load permissions and embargo data on initialization, in a single query
+        # Parent works are returned by the works query itself
+        self.permissions, self.embargos = self.get_attribute_mappings()
+        # Fuse the mappings into one lookup of the fields to set on each resource
+        # Later mappings take precedence, e.g., an embargo's visibility overrides that from permissions
+        self.attributes = defaultdict(dict)
+        for mapping in (self.permissions, self.embargos):
+            for resource_id, fields in mapping.fields_per_resource():
+                self.attributes[resource_id].update(fields)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Releases the thread pool held by the batch handler for copying files."""
+        self.batch_handler.close()
 
     @staticmethod
     def load_mapping(path_to_mapping: str) -> Dict[str, tuple[str, bool]]:
-        with open(path_to_mapping) as f:
-            reader = DictReader(f)
-            mapping = [r for r in reader]
-        return {
-            str(row["predicate"]): (
-                str(row["bulkrax_field"]),
-                True if str(row["multiple"]).lower() == "true" else False,
+        with open(path_to_mapping, newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            p, b, m = (
+                header.index("predicate"),
+                header.index("bulkrax_field"),
+                header.index("multiple"),
             )
-            for row in mapping
-        }
+            # Predicates and field names are interned, since every resource's triples are looked up against them
+            return {
+                sys.intern(row[p]): (sys.intern(row[b]), row[m].lower() == "true")
+                for row in reader
+            }
 
-    def get_resources(self, model) -> Iterator:
+    def query(self, sparql: str) -> Iterator:
+        """Runs a query against the store. If a query cache is configured, results are saved to disk, keyed by the query and a fingerprint of the graph's files, and reused on later runs.
+        Cache entries are loaded with pickle, so the cache directory must be trusted."""
+        if not self.query_cache:
+            return self.store.query(sparql)
+        key = blake2b(
+            f"{self.graph_fingerprint}\n{sparql}".encode("utf-8"), digest_size=16
+        ).hexdigest()
+        cache_path = self.query_cache / f"{key}.pickle"
+        if cache_path.exists():
+            with open(cache_path, "rb") as f:
+                return pickle.load(f)
+        results = self.store.query(sparql)
+        # QuerySolutions can't be pickled, but their terms can, and a dict supports the same lookups by variable name
+        variables = [v.value for v in results.variables]
+        rows = [{v: solution[v] for v in variables} for solution in results]
+        # Write to a temporary file first, so an interrupted run doesn't leave a partial cache entry
+        tmp_path = cache_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(rows, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+        return rows
+
+    def group_resources(self, model) -> Dict[str, List]:
         """
-        Returns all works, optionally limited to a given Hyrax AdminSet
+        Queries for all resources of the given model, optionally limited to a given Hyrax AdminSet, grouping the results by resource ID
         """
         admin_set_values = ""
         admin_set_criteria = ""
+        parents_union = ""
         if model == Collection:
             models_str = '"Collection"'
         else:
@@ -145,43 +326,44 @@ class FedoraGraph:
                 admin_set_values = 'values ?adminSet {{ "{admin_set}" }}'.format(
                     admin_set=self.admin_set
                 )
+            parents_union = FedoraGraph.PARENTS_UNION
             admin_set_criteria = """?s partOf: ?a.
             ?a fedora:hasModel ?adminSetModel.
             ?a title: ?adminSet"""
-
-        query = """
-            prefix fedora: <info:fedora/fedora-system:def/model#>
-            prefix pcdm: <http://pcdm.org/models#>
-            prefix partOf: <http://purl.org/dc/terms/isPartOf>
-            prefix title: <http://purl.org/dc/terms/title>
-
-            select distinct ?s ?p ?o ?adminSet
-            where {{
-               values ?model {{ {models} }}
-               values ?adminSetModel {{ "AdminSet" }}
-               {admin_set_values}
-               ?s ?p ?o.
-               ?s fedora:hasModel ?model.
-               {admin_set_criteria}
-            }}
-            order by ?s
-        """.format(
+        # Restrict the query to mapped predicates, since the rest would be discarded by make_resource
+        query = FedoraGraph.RESOURCES_QUERY.format(
             models=models_str,
+            predicates=self.predicates,
+            parents_union=parents_union,
             admin_set_values=admin_set_values,
             admin_set_criteria=admin_set_criteria,
         )
 
-        # Return results grouped by ID
-        for k, g in groupby(self.store.query(query), key=lambda r: r["s"].value):
+        # Group results by ID in a single pass, rather than sorting every triple in the query
+        triples_by_id = defaultdict(list)
+        for r in self.query(query):
+            triples_by_id[r["s"].value].append(r)
+        return triples_by_id
+
+    def get_resources(
+        self, model, triples_by_id: Optional[Dict[str, List]] = None
+    ) -> Iterator:
+        """
+        Returns all works, optionally limited to a given Hyrax AdminSet. Results already grouped with group_resources may be passed in.
+        """
+        if triples_by_id is None:
+            triples_by_id = self.group_resources(model)
+        # Emit resources ordered by ID, to match the ordering of filesets
+        for k in sorted(triples_by_id):
             yield model.make_resource(
                 id=k,
-                triples=g,
+                triples=triples_by_id.pop(k),
                 mapping=self.mapping,
                 field_defaults=self.field_defaults,
             )
 
-    def get_filesets(self) -> Iterator[FileSet]:
-        """Returns all filesets with references to parent works and file URI's."""
+    def group_filesets(self) -> Dict[str, List[FileSet]]:
+        """Queries for all filesets, with references to parent works and file URI's, grouping them by parent work ID."""
         if self.admin_set:
             admin_set_values = """
           values ?adminSetModel {{ "AdminSet" }}
@@ -195,125 +377,61 @@ class FedoraGraph:
         else:
             admin_set_values, admin_set_criteria = "", ""
         models_str = " ".join([f'"{model}"' for model in self.models])
-        fileset_query = """
-          prefix fedora: <info:fedora/fedora-system:def/model#>
-          PREFIX fedora_repo: <http://fedora.info/definitions/v4/repository#>
-          prefix ns: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-          prefix pcdm: <http://pcdm.org/models#>
-          prefix partOf: <http://purl.org/dc/terms/isPartOf>
-          prefix title: <http://purl.org/dc/terms/title>
-
-          select distinct (?s as ?work) (?fs as ?fileset) (?fn as ?filename) (?fu as ?file_uri)
-          where {{
-                {admin_set_values}
-                values ?model {{ {models} }}
-                ?s fedora:hasModel ?model.
-                ?s pcdm:hasMember ?fs.
-                ?fs ns:type ?fm.
-                ?fs fedora:downloadFilename ?fn.
-                ?fs pcdm:hasFile ?fu.
-                ?fu ns:type <http://pcdm.org/use#OriginalFile>.
-                {admin_set_criteria}
-                filter(str(?fm) = "http://projecthydra.org/works/models#FileSet")
-            }}
-            order by ?s
-      """.format(
+        fileset_query = FedoraGraph.FILESETS_QUERY.format(
             admin_set_values=admin_set_values,
             admin_set_criteria=admin_set_criteria,
             models=models_str,
         )
-        # group by parent work ID for batching
-        for k, g in groupby(
-            self.store.query(fileset_query), key=lambda r: r["work"].value
-        ):
-            for triple in g:
-                yield FileSet.make_fileset(triple)
-
-    def get_parents(self) -> ParentChildMapping:
-        """Matches parent works to their children."""
-        children_query = """
-            prefix pcdm: <http://pcdm.org/models#>
-            prefix ns: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-
-            select ?parent ?resource
-            where {
-                values  ?root { <http://localhost:8984/rest/prod> }
-                ?parent pcdm:hasMember ?resource.
-                ?resource ns:type <http://projecthydra.org/works/models#Work>.
-                filter (?parent != ?root )
-
-            }
-        """
-        return ParentChildMapping().make_mapping(self.store.query(children_query))
-
-    def get_permissions(self) -> PermissionsMapping:
-        """Creates mapping of group-level permissions mapped to the resource ID's they control."""
-        query = """
-            prefix fedoraModel: <info:fedora/fedora-system:def/model#>
-            prefix acl: <http://www.w3.org/ns/auth/acl#>
-
-            select distinct ?agent ?resource
-
-            where {
-
-                ?s fedoraModel:hasModel ?model.
-                ?s acl:agent ?agent.
-                ?s acl:accessTo ?resource.
-                filter(str(?model) = "Hydra::AccessControls::Permission")
-                filter(contains(str(?agent), "group"))
-            }
-            order by ?resource
-            """
-
-        return PermissionsMapping().make_mapping(self.store.query(query))
-
-    def get_embargos(self) -> EmbargoMapping:
-        "Extracts embargo details, mapping to embargoed resource ID's."
-        query = """
-            prefix fedora_model: <info:fedora/fedora-system:def/model#>
-            prefix hydra_acl: <http://projecthydra.org/ns/auth/acl#>
-            prefix pcdm_model: <http://pcdm.org/models#>
-
-            select distinct ?resource ?visibilityDuringEmbargo ?visibilityAfterEmbargo ?releaseDate
-            where {
-                ?s fedora_model:hasModel ?model.
-                ?s hydra_acl:embargoReleaseDate ?releaseDate.
-                ?s hydra_acl:visibilityDuringEmbargo ?visibilityDuringEmbargo.
-                ?s hydra_acl:visibilityAfterEmbargo ?visibilityAfterEmbargo.
-                ?resource hydra_acl:hasEmbargo ?s.
-                filter(str(?model) = "Hydra::AccessControls::Embargo")
-            }
-        """
-        return EmbargoMapping().make_mapping(self.store.query(query))
+        # Group filesets by parent work ID in a single pass, as for works
+        filesets_by_work = defaultdict(list)
+        for triple in self.query(fileset_query):
+            # The parent work ID is read from the solution once, by make_fileset
+            fileset = FileSet.make_fileset(triple)
+            filesets_by_work[fileset.parents].append(fileset)
+        return filesets_by_work
+
+    def get_filesets(
+        self, filesets_by_work: Optional[Dict[str, List[FileSet]]] = None
+    ) -> Iterator[FileSet]:
+        """Returns all filesets with references to parent works and file URI's. Results already grouped with group_filesets may be passed in."""
+        if filesets_by_work is None:
+            filesets_by_work = self.group_filesets()
+        # Emit filesets ordered by parent work ID for batching, matching the order of works
+        for k in sorted(filesets_by_work):
+            yield from filesets_by_work.pop(k)
+
+    def get_attribute_mappings(self) -> Tuple[PermissionsMapping, EmbargoMapping]:
+        """Creates mappings of group-level permissions and of embargo details to the resource ID's they control, from one pass over the store."""
+        rows = {"permission": [], "embargo": []}
+        for row in self.query(FedoraGraph.ATTRIBUTES_QUERY):
+            rows[row["kind"].value].append(row)
+        return (
+            PermissionsMapping().make_mapping(rows["permission"]),
+            EmbargoMapping().make_mapping(rows["embargo"], now=self.now),
+        )
 
     def format_for_bulkrax(self, data: Dict[str, str]) -> Dict[str, str]:
         """Formats each value for Bulkrax, extracting resource identifiers from URI's, and combining duplicate fields using either a semicolon or a pipe."""
         row = data.copy()
-        for key, value in data.items():
-            if key in ("id", "parents"):
-                value = uri_to_id(value)
-                if isinstance(value, list):
-                    row[key] = ";".join(value)
-                elif key == "id":
-                    # model_key = re.sub(
-                    #    r"([a-z])([A-Z])", r"\1_\2", data["model"]
-                    # ).lower()
-                    row["bulkrax_identifier"] = value  # f"{model_key}s_{value}"
-                else:
-                    row[key] = value
-            elif (key in self.pipe_delimited) and isinstance(value, list):
-                row[key] = "|".join(value)
-            elif isinstance(value, list):
-                row[key] = "; ".join(value)
+        get_joiner = self.joiners.get
         # Exclude the original ID from the CSV for export
-        del row["id"]
+        resource_id = uri_to_id(row.pop("id"))
+        # The identifier fields are handled up front, so the loop below only has to join multi-valued fields
+        if "parents" in row:
+            parents = uri_to_id(row["parents"])
+            row["parents"] = ";".join(parents) if isinstance(parents, list) else parents
+        for key, value in row.items():
+            if isinstance(value, list):
+                row[key] = get_joiner(key, _semicolon_join)(value)
+        # model_key = re.sub(
+        #    r"([a-z])([A-Z])", r"\1_\2", data["model"]
+        # ).lower()
+        row["bulkrax_identifier"] = resource_id  # f"{model_key}s_{resource_id}"
         return row
 
     def process_filesets(self, resource, has_parent):
-        filesets, self.fileset_iter = before_and_after(
-            lambda x: resource.id == x.parents, self.fileset_iter
-        )
-        for fileset in filesets:
+        # Look up the work's filesets directly, rather than walking a fileset iterator in step with the works
+        for fileset in self.filesets_by_work.pop(resource.id, ()):
             fileset = self.apply_attributes(fileset)
             if has_parent:
                 self.works_with_parents_filesets[resource.id].append(fileset)
@@ -330,10 +448,11 @@ class FedoraGraph:
                 self.batch_handler.add_resource(fileset, True)
 
     def apply_attributes(self, resource: Resource | FileSet) -> Resource | FileSet:
-        """Applies permissions, embargos, parent-child relationships, and changes from the change set"""
-        resource = self.permissions.update_resource(resource)
-        resource = self.embargos.update_resource(resource)
-        resource = self.parents.update_resource(resource)
+        """Applies permissions, embargos, and changes from the change set"""
+        fields = self.attributes.get(resource.id)
+        if fields:
+            for field, value in fields.items():
+                resource.update(field, value)
         resource = self.change_set.apply_changes(resource)
         return resource
 
@@ -342,21 +461,27 @@ class FedoraGraph:
     ) -> Iterator[BatchResult]:
         """Lazily emits batches of rows for compilation into a Bulkrax csv."""
 
+        admin_set = (self.admin_set or "").replace(" ", "_").lower()
+        if self.admin_set:
+            logger.info(f"Getting objects for resources in admin set {self.admin_set}")
+        else:
+            logger.info("Getting all objects in respository.")
+        # The collection, work and fileset queries are independent, so run them concurrently up front
+        with ThreadPoolExecutor(max_workers=3) as exe:
+            collections = exe.submit(self.group_resources, Collection)
+            works = exe.submit(self.group_resources, Work)
+            filesets = exe.submit(self.group_filesets)
         # Using manual iterators in order to be precise about the batch size
         # Exhaust collections first, then works
         # This ensures collections will be imported first
         self.resource_iter = chain(
-            self.get_resources(Collection), self.get_resources(Work)
+            self.get_resources(Collection, collections.result()),
+            self.get_resources(Work, works.result()),
         )
-        self.fileset_iter = self.get_filesets()
+        self.filesets_by_work = filesets.result()
         self.works_with_parents = ChildQueue(lambda x: x.parents)
         self.works_with_parents_filesets = defaultdict(list)
         self.import_counter = Counter()
-        admin_set = (self.admin_set or "").replace(" ", "_").lower()
-        if self.admin_set:
-            logger.info(f"Getting objects for resources in admin set {self.admin_set}")
-        else:
-            logger.info("Getting all objects in respository.")
         for resource in self.resource_iter:
             # Add fields from relationships to ACL's, embargos, and parent works
             resource = self.apply_attributes(resource)
@@ -364,8 +489,7 @@ class FedoraGraph:
             has_parent = self.works_with_parents.stored(resource)
             if not has_parent:
                 self.batch_handler.add_resource(resource)
-            # Filesets should be in the same order as their parent works, ordered by work ID
-            # So we take from the FileSet iterator as long as the id matches that of the current work
+            # Filesets are added directly after their parent work, looked up by work ID
             # Collections don't have FileSets, when the resource is a collection, this should be []
             self.process_filesets(resource, has_parent)
             self.import_counter[resource.model] += 1
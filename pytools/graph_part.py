@@ -1,4 +1,5 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List
 
@@ -16,11 +17,21 @@ class GraphPart:
         logger.info(f"Adding {ttl} to graph.")
         self.g.bulk_load(path=ttl)
 
-    def walk(self):
-        for d in self.dirs:
-            for p in d.rglob("*"):
-                if p.is_file() and (p.name.endswith(".ttl") or p.name.endswith(".nt")):
-                    self.add_nodes(p)
+    def walk(self, max_workers: int = 1):
+        paths = [
+            p
+            for d in self.dirs
+            for p in d.rglob("*")
+            if p.is_file() and p.suffix in (".ttl", ".nt")
+        ]
+        if max_workers <= 1:
+            for path in paths:
+                self.add_nodes(path)
+            return
+        # Oxigraph releases the GIL while bulk loading, so files can be loaded concurrently,
+        # but each bulk load runs its own threads, so keep the pool small
+        with ThreadPoolExecutor(max_workers=max_workers) as exe:
+            list(exe.map(self.add_nodes, paths))
 
     def parse_list(self, p_list: List[Path | str]):
         for p in p_list:
@@ -1,43 +1,41 @@
-from itertools import groupby
-from typing import Iterator, Tuple
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
 
 from pytools.resources import *
-from pytools.utils import convert_date, is_active_embargo, uri_to_id
+from pytools.utils import convert_date, is_active_embargo, parse_date
 
 
 class PermissionsMapping:
     """
-    Expect each resource to have an array of permission groups.
+    Expect each resource to have the rank of its most permissive permission group, computed in the query.
     """
 
+    # Visibility corresponding to each group rank: 0 = other groups, 1 = registered, 2 = public
+    visibilities = ("restricted", "authenticated", "open")
+
     def __init__(self):
-        self.permissions_per_resource = {}
+        self.visibility_per_resource = {}
 
-    def make_mapping(self, results: Iterator[Tuple[str, str]]):
-        # Since a resource can have multiple permissions, store them as a list
-        # Group by resource ID
-        #  (r["agent"].value, r["resource"].value
-        for k, g in groupby(results, key=lambda r: r["resource"].value):
-            self.permissions_per_resource[k] = []
-            for row in g:
-                self.permissions_per_resource[k].append(row["agent"].value)
+    def make_mapping(self, results: Iterator):
+        # Permissions are grouped by resource ID in the query, so there is one row per resource
+        # The visibility is resolved once here, rather than each time a resource is updated
+        visibilities = PermissionsMapping.visibilities
+        for row in results:
+            self.visibility_per_resource[row["resource"].value] = visibilities[
+                int(row["groupRank"].value)
+            ]
         return self
 
     def update_resource(self, resource: Resource | FileSet) -> Resource | FileSet:
-        permission = self.permissions_per_resource.get(resource.id)
-        if permission:
-            visibility = "restricted"
-            for group_uri in permission:
-                group_id = uri_to_id(group_uri).split("#")[-1]
-                match group_id:
-                    case "public":
-                        visibility = "open"
-                        break
-                    case "registered":
-                        visibility = "authenticated"
+        visibility = self.visibility_per_resource.get(resource.id)
+        if visibility:
             resource.update("visibility", visibility)
         return resource
 
+    def fields_per_resource(self) -> Iterator[Tuple[str, Dict[str, str]]]:
+        for resource_id, visibility in self.visibility_per_resource.items():
+            yield resource_id, {"visibility": visibility}
+
 
 class EmbargoMapping:
     """
@@ -47,46 +45,30 @@ class EmbargoMapping:
     def __init__(self):
         self.embargo_per_resource = {}
 
-    def make_mapping(self, results: Iterator):
+    def make_mapping(self, results: Iterator, now: Optional[datetime] = None):
+        """Release dates are parsed, and checked against a single point in time (by default, the current time), once per embargo."""
+        now = now or datetime.now()
         for r in results:
-            self.embargo_per_resource[r["resource"].value] = {
-                "visibility_during_embargo": r["visibilityDuringEmbargo"].value,
-                "visibility_after_embargo": r["visibilityAfterEmbargo"].value,
-                "embargo_release_date": r["releaseDate"].value,
-                "visibility": "embargo",
-            }
+            release_date = parse_date(r["releaseDate"].value)
+            if is_active_embargo(release_date, now):
+                embargo = {
+                    "visibility_during_embargo": r["visibilityDuringEmbargo"].value,
+                    "visibility_after_embargo": r["visibilityAfterEmbargo"].value,
+                    "embargo_release_date": convert_date(release_date),
+                    "visibility": "embargo",
+                }
+            # If the embargo release date is in the past, update the visibility per the embargo instructions
+            else:
+                embargo = {"visibility": r["visibilityAfterEmbargo"].value}
+            self.embargo_per_resource[r["resource"].value] = embargo
         return self
 
     def update_resource(self, resource: Resource | FileSet) -> Resource | FileSet:
         embargo = self.embargo_per_resource.get(resource.id)
         if embargo:
-            if is_active_embargo(embargo):
-                embargo["embargo_release_date"] = convert_date(
-                    embargo["embargo_release_date"]
-                )
-                for k, v in embargo.items():
-                    resource.update(k, v)
-            # If the embargo release date is in the past, update the visibility per the embargo instructions
-            else:
-                resource.update("visibility", embargo["visibility_after_embargo"])
+            for k, v in embargo.items():
+                resource.update(k, v)
         return resource
 
-
-class ParentChildMapping:
-    """
-    Maps child works to parents. Assumes a single work can have multiple parents.
-    """
-
-    def __init__(self):
-        self.parent_child_mapping = defaultdict(list)
-
-    def make_mapping(self, results: Iterator):
-        for row in results:
-            self.parent_child_mapping[row["resource"].value].append(row["parent"].value)
-        return self
-
-    def update_resource(self, resource: Resource | FileSet) -> Resource | FileSet:
-        parents = self.parent_child_mapping.get(resource.id)
-        if parents:
-            resource.update("parents", parents)
-        return resource
+    def fields_per_resource(self) -> Iterator[Tuple[str, Dict[str, str]]]:
+        return iter(self.embargo_per_resource.items())
@@ -9,7 +9,8 @@ class StaggeredQueue:
     def __init__(self, attr_fn):
         self.attr_fn = attr_fn
         self.data = []
-        self.seen = []
+        # Attributes already taken in the current pass, as a set for constant-time membership checks
+        self.seen = set()
 
     def add(self, item):
         self.data.append(item)
@@ -23,7 +24,7 @@ class StaggeredQueue:
         return list(islice(self, n))
 
     def __iter__(self):
-        self.seen = []
+        self.seen = set()
         self.index = 0
         return self
 
@@ -39,7 +40,7 @@ class StaggeredQueue:
                 raise StopIteration
         # Assuming there's at least one item with a unique attribute, return it and record its attribute
         item = self.data.pop(self.index)
-        self.seen.append(self.attr_fn(item))
+        self.seen.add(self.attr_fn(item))
         return item
 
 
@@ -68,8 +69,7 @@ class ChildQueue:
 
     def get_children(self, parents: Set[str]):
         for parents_, children in self.parents_to_children.items():
-            if children and (set(parents_) <= parents):
+            if children and parents.issuperset(parents_):
                 while children:
-                    item = children.pop()
-                    yield self.children[item]
-                    del self.children[item]
+                    # Remove the child before yielding it, so that it is not left behind when a consumer (e.g., take) stops early
+                    yield self.children.pop(children.pop())
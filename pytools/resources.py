@@ -1,15 +1,17 @@
+import os
 import re
-from collections import defaultdict
 from dataclasses import dataclass
-from pathlib import Path
+from functools import lru_cache
 from typing import Dict, Iterator, Optional, Tuple
-from urllib.parse import urlparse
 from uuid import uuid1
 
 from pytools.utils import uri_to_id
 
 
 class Resource:
+    # Fields mapped from the graph live in self.data, so the attributes are fixed, and instances don't need a __dict__
+    __slots__ = ("id", "admin_set", "field_defaults", "data")
+
     def __init__(self, id, admin_set, field_defaults=None, **kwargs):
         self.id = id
         self.admin_set = admin_set
@@ -29,20 +31,32 @@ class Resource:
         """
         Helper method for creating instances of resource classes from Fedora object models
         """
-        kwargs = defaultdict(list)
+        kwargs = {}
+        # Bind the lookups locally, since they run once per triple
+        get_field = mapping.get
+        get_kwarg = kwargs.get
+        triple = None
         for triple in triples:
-            if triple["p"].value in mapping:
-                # Get Bulkrax field from RDF predicate
-                (field_name, multiple) = mapping[triple["p"].value]
-                # Array fields
-                if multiple:
-                    kwargs[field_name].append(triple["o"].value)
-                # Single-value fields
+            # Get Bulkrax field from RDF predicate
+            field = get_field(triple["p"].value)
+            if field is None:
+                continue
+            (field_name, multiple) = field
+            # Array fields
+            if multiple:
+                values = get_kwarg(field_name)
+                if values is None:
+                    kwargs[field_name] = [triple["o"].value]
                 else:
-                    kwargs[field_name] = triple["o"].value
+                    values.append(triple["o"].value)
+            # Single-value fields
+            else:
+                kwargs[field_name] = triple["o"].value
         # Expect the AdminSet name to be the final element in each "triple"
         # We don't need to include it in the import CSV, but it needs to be set at time of import
-        admin_set = triple["adminSet"].value if triple["adminSet"] else None
+        admin_set = triple["adminSet"] if triple else None
+        if admin_set:
+            admin_set = admin_set.value
         return cls(id=id, admin_set=admin_set, field_defaults=field_defaults, **kwargs)
 
     def update(self, field, value):
@@ -64,10 +78,12 @@ class Resource:
 
 
 class Work(Resource):
-    pass
+    __slots__ = ()
 
 
 class Collection(Resource):
+    __slots__ = ()
+
     def format_row(self, formatter):
         # Can't have the creator field blank when importing collections
         if not self.data.get("creator"):
@@ -75,6 +91,22 @@ class Collection(Resource):
         return super().format_row(formatter)
 
 
+def _binary_path(path_to_root: str, file_uri: str) -> str:
+    # Not necessary to use the version information to access the latest version of the binary
+    # version_path = urlparse(file_set["version"])
+    # Fedora URI's have no query or fragment, so the path is everything after the host
+    path_start = file_uri.find("/", file_uri.find("://") + 3) + 1
+    return os.path.join(path_to_root, f"{file_uri[path_start:]}.binary")
+
+
+@lru_cache(maxsize=100_000)
+def _existing_binary_path(path_to_root: str, file_uri: str) -> Optional[str]:
+    # Cached for the run, since the exported binaries do not change during a migration
+    file_path = _binary_path(path_to_root, file_uri)
+    if os.path.exists(file_path):
+        return file_path
+
+
 @dataclass
 class FileSet:
     """
@@ -105,16 +137,13 @@ class FileSet:
             file_uri=file_uri,
         )
 
-    def get_file_path(self, path_to_root: str) -> Optional[Path]:
-        """Construct the path to each (binary) file for copying."""
-        file_path = urlparse(self.file_uri).path[1:]
-        # Not necessary to use the version information to access the latest version of the binar
-        # version_path = urlparse(file_set["version"])
-        file_path = Path(path_to_root) / f"{file_path}.binary"
-        if file_path.exists():
-            return file_path
-        else:
-            pass
+    def get_file_path(
+        self, path_to_root: str, check_exists: bool = True
+    ) -> Optional[str]:
+        """Construct the path to each (binary) file for copying. If check_exists is True, returns None when the file is missing."""
+        if check_exists:
+            return _existing_binary_path(str(path_to_root), self.file_uri)
+        return _binary_path(str(path_to_root), self.file_uri)
 
     def update(self, field, value):
         # For updating visibility and embargo attributes, post-init
@@ -166,8 +166,8 @@ class S3OcflRepo:
         # unpack extracted data (from struct)
         # create column to store version, case to int (for correct sorting)
         # group by OCFL ID
-        # sort by version within each group
-        # take the first element of each sorted group -> latest version by ID
+        # take the row at the maximum version within each group -> latest version by ID
+        # (a single pass per group, rather than sorting each group by version)
         self.rdf_df = (
             df.filter(
                 pl.col("key").str.ends_with(".nt")
@@ -184,7 +184,7 @@ class S3OcflRepo:
             .unnest("key_struct")
             .with_columns(pl.col("version").cast(pl.Int32))
             .group_by("key_base")
-            .agg(pl.all().sort_by("version", descending=True).first())
+            .agg(pl.all().get(pl.col("version").arg_max()))
         )
         # Filter on binary originals
         self.originals = df.filter(
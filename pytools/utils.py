@@ -1,15 +1,16 @@
+import csv
 import logging
 from collections import Counter
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from csv import DictWriter
 from datetime import datetime
+from functools import lru_cache
 from hashlib import md5, sha256
-from io import StringIO
+from io import TextIOWrapper
 from pathlib import Path
-from shutil import copy2
-from typing import List
+from shutil import copyfile
+from typing import List, Optional
 from uuid import uuid1
-from zipfile import ZipFile
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
 
 from pytools.queue import StaggeredQueue
 
@@ -37,22 +38,31 @@ def etag_checksum(filename, chunk_size=8 * 1024 * 1024):
     return "{}-{}".format(m.hexdigest(), len(md5s))
 
 
+@lru_cache(maxsize=100_000)
+def _uri_to_id(uri: str) -> str:
+    # Cached, since the same parent and permission URI's recur across many resources
+    return uri.rpartition("/")[2]
+
+
 def uri_to_id(uri: str | List[str]):
     if isinstance(uri, list):
-        return [uri_to_id(element) for element in uri]
-    return uri.split("/")[-1]
+        return [_uri_to_id(element) for element in uri]
+    return _uri_to_id(uri)
+
+
+def parse_date(date_str: str) -> datetime:
+    return datetime.fromisoformat(date_str).replace(tzinfo=None)
 
 
-def convert_date(date_str: str) -> str:
+def convert_date(date: str | datetime) -> str:
     # Format date without timestamp for Bulkrax
-    return datetime.fromisoformat(date_str).replace(tzinfo=None).strftime("%Y-%m-%d")
+    if isinstance(date, str):
+        date = parse_date(date)
+    return date.strftime("%Y-%m-%d")
 
 
-def is_active_embargo(record) -> bool:
-    return (
-        datetime.fromisoformat(record["embargo_release_date"]).replace(tzinfo=None)
-        >= datetime.now()
-    )
+def is_active_embargo(release_date: datetime, now: Optional[datetime] = None) -> bool:
+    return release_date >= (now or datetime.now())
 
 
 class Fedora6Exception(Exception):
@@ -92,15 +102,13 @@ class BatchResult:
         self.files_copied = files_copied
         self.batch_handler = batch_handler
 
-    def make_csv(self):
-        output = StringIO()
-        writer = DictWriter(
-            output, fieldnames=list({k for row in self.rows for k in row})
-        )
-        writer.writeheader()
-        for row in self.rows:
-            writer.writerow(row)
-        return output.getvalue()
+    def write_csv(self, output):
+        # Union of fields across rows, in the order first seen
+        fieldnames = list(dict.fromkeys(k for row in self.rows for k in row))
+        # Rows are written positionally, with blanks for missing fields, as DictWriter would
+        writer = csv.writer(output)
+        writer.writerow(fieldnames)
+        writer.writerows([row.get(k, "") for k in fieldnames] for row in self.rows)
 
     def cleanup_files(self, path_to_batch):
         for file_dict in self.files_copied:
@@ -117,9 +125,21 @@ class BatchResult:
             )
             path_to_batch.mkdir(exist_ok=True)
             zipfile_path = self.batch_handler.output_path / f"{path_to_batch.name}.zip"
-            with ZipFile(zipfile_path, "w") as f:
+            # Binaries (images, PDF's, etc.) are mostly compressed already, so they are stored as is
+            with ZipFile(zipfile_path, "w", compression=ZIP_STORED) as f:
                 f.mkdir("files")
-                f.writestr(f"{path_to_batch.name}.csv", data=self.make_csv())
+                # The CSV is small and compresses well, so it alone is deflated
+                csv_info = ZipInfo(
+                    f"{path_to_batch.name}.csv",
+                    date_time=datetime.now().timetuple()[:6],
+                )
+                csv_info.compress_type = ZIP_DEFLATED
+                # Write the CSV straight into the archive, rather than building it in memory first
+                with f.open(csv_info, "w") as csv_file:
+                    with TextIOWrapper(
+                        csv_file, encoding="utf-8", newline=""
+                    ) as output:
+                        self.write_csv(output)
                 for file_dict in self.files_copied:
                     file = Path(file_dict["destination"])
                     f.write(file, arcname=f"files/{file.name}")
@@ -136,12 +156,24 @@ class BatchResult:
 class BatchHandler:
     """Handles preparation of batches of data for CSV output"""
 
-    def __init__(self, batch_size, formatter, output_path, path_to_root, dry_run=False):
+    def __init__(
+        self,
+        batch_size,
+        formatter,
+        output_path,
+        path_to_root,
+        dry_run=False,
+        max_workers=32,
+    ):
         self.batch_size = batch_size
         self.formatter = formatter
         self.output_path = Path(output_path)
         self.path_to_root = path_to_root
         self.dry_run = dry_run
+        # Copying is I/O-bound, so use more threads than there are CPUs
+        # The pool is shared across batches, and only started when there are files to copy
+        self.max_workers = max_workers
+        self._copy_executor = None
 
         self.resources = []
         self.files_staging = []  # next batch of files to copy
@@ -163,10 +195,13 @@ class BatchHandler:
         if not self.done and len(self.resources) < self.batch_size:
             return None, None
         # Remove this batch from the available rows
-        rows = []
-        for resource in self.resources[: self.batch_size]:
-            rows.append(resource.format_row(self.formatter))
-        self.resources = self.resources[len(rows) :]
+        formatter = self.formatter
+        rows = [
+            resource.format_row(formatter)
+            for resource in self.resources[: self.batch_size]
+        ]
+        # Drop the taken resources in place, rather than copying the remainder into a new list
+        del self.resources[: self.batch_size]
         for fileset in self.fileset_queue.take(self.batch_size):
             # Move file to staging
             self.files_staging.append(fileset)
@@ -184,8 +219,32 @@ class BatchHandler:
         else:
             self.fileset_queue.add(resource)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def copy_executor(self):
+        if self._copy_executor is None:
+            self._copy_executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._copy_executor
+
+    def close(self):
+        """Shuts down the thread pool used for copying files, if one was started, waiting for any copies in progress."""
+        if self._copy_executor is not None:
+            self._copy_executor.shutdown(wait=True)
+            self._copy_executor = None
+
     def copy_files(self, batch_id, concurrently=False):
-        if concurrently:
+        if self.files_staging and not self.dry_run:
+            # Create the batch's files directory once, rather than in each copy task
+            (self.output_path / f"batch_{batch_id}/files").mkdir(
+                parents=True, exist_ok=True
+            )
+        # A dry run only checks that files exist, which doesn't need the pool
+        if concurrently and self.files_staging and not self.dry_run:
             result = self.copy_files_concurrently(batch_id, self.files_staging)
         else:
             result = self._copy_files(batch_id, self.files_staging)
@@ -196,10 +255,9 @@ class BatchHandler:
         """Copy binary files associated with filesets to the specified destination. Renames file using filename metadata."""
         output = []
         pd = self.output_path / f"batch_{batch_id}/files"
-        if not self.dry_run:
-            pd.mkdir(parents=True, exist_ok=True)
         for fs in files:
-            file_path = fs.get_file_path(self.path_to_root)
+            # Only the dry run needs to check for the file up front; when copying, a missing file fails the copy itself
+            file_path = fs.get_file_path(self.path_to_root, check_exists=self.dry_run)
             if self.dry_run:
                 output.append(
                     {
@@ -211,7 +269,8 @@ class BatchHandler:
                 )
             else:
                 try:
-                    out = copy2(file_path, pd / fs.file)
+                    # Metadata isn't needed for import, and copyfile can use a zero-copy system call
+                    out = copyfile(file_path, pd / fs.file)
                     output.append(
                         {
                             "filset_id": fs.id,
@@ -229,18 +288,17 @@ class BatchHandler:
         return output
 
     def copy_files_concurrently(self, batch_id, file_sets):
-        with ThreadPoolExecutor() as exe:
-            # copy files in batches of 10
-            data = []
-            futures = {
-                exe.submit(self._copy_files, batch_id, file_sets[i : i + 10]): i
-                for i in range(0, len(file_sets), 10)
-            }
-            for future in as_completed(futures):
-                try:
-                    data.extend(future.result())
-                except Exception as e:
-                    error_msg = f"Error copying files in batch {batch_id}"
-                    logger.error(error_msg, e)
-                    continue
+        # Copy each file in its own task, so that a large file doesn't hold up the files queued behind it
+        data = []
+        futures = [
+            self.copy_executor.submit(self._copy_files, batch_id, [file_set])
+            for file_set in file_sets
+        ]
+        for future in as_completed(futures):
+            try:
+                data.extend(future.result())
+            except Exception as e:
+                error_msg = f"Error copying files in batch {batch_id}"
+                logger.error(error_msg, e)
+                continue
         return data
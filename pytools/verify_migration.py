@@ -56,7 +56,7 @@ class Fedora6Graph:
             dest_path = root_dir / label
             dest_path.mkdir(exist_ok=True)
             for uri in uris.values():
-                urlretrieve(uri, dest_path / f"{uri.split('/')[-1]}")
+                urlretrieve(uri, dest_path / f"{uri.rpartition('/')[2]}")
         return root_dir
 
     def load_metadata_maps(self, custom_models=True):
@@ -256,15 +256,16 @@ class Fedora6Graph:
         }
         # Add "internal" metadata attributes
         for k, v in self.metadata[internals_key].items():
-            predicate_map.update({v["predicate"]: k})
+            predicate_map[v["predicate"]] = k
+        get_attr = predicate_map.get
         # Group by resource ID
         for k, g in groupby(rows_iter, key=lambda row: row["id"].value):
             row = defaultdict(list)
             for triple in g:
-                if triple["predicate"].value in predicate_map:
-                    row[predicate_map[triple["predicate"].value]].append(
-                        triple["object"].value
-                    )
+                # Look up each solution's predicate only once
+                attr = get_attr(triple["predicate"].value)
+                if attr:
+                    row[attr].append(triple["object"].value)
             if not row.get("id"):
                 # Insert logging here to flag these
                 row["id"] = [k]
@@ -310,7 +311,7 @@ class Fedora6Graph:
                 "visibility_after_embargo",
                 "embargo_release_date",
             ]:
-                resource.update({k: triple[k].value})
+                resource[k] = triple[k].value
         return list(lookup.values())
 
     def add_acls(
@@ -324,15 +325,11 @@ class Fedora6Graph:
                 continue
             if not "visibility" in resource:
                 resource["visibility"] = "restricted"
-            if (
-                triple["agent"].value == "group/public"
-                and triple["mode"].value == "read"
-            ):
+            # Read each term once
+            agent, mode = triple["agent"].value, triple["mode"].value
+            if agent == "group/public" and mode == "read":
                 resource["visibility"] = "open"
-            elif (
-                triple["agent"].value == "group/registered"
-                and triple["mode"].value == "read"
-            ):
+            elif agent == "group/registered" and mode == "read":
                 resource["visibility"] = "authenticated"
         return list(lookup.values())
 
@@ -361,9 +358,9 @@ class Fedora6Graph:
                         )
                     )
                 else:
-                    files_metadata["derivatives"] = files_metadata.get(
-                        "derivatives", []
-                    ) + [result["http://vocabulary.samvera.org/ns#pcdmUse"]]
+                    files_metadata.setdefault("derivatives", []).append(
+                        result["http://vocabulary.samvera.org/ns#pcdmUse"]
+                    )
             file_set.update(files_metadata)
         return file_sets
 
@@ -378,12 +375,10 @@ class Fedora6Graph:
         self.works, self.file_sets = self.link_works_to_filesets(
             works, file_sets, links
         )
-        embargoes = list(store.query(self.embargo_query))
-        self.works = self.add_embargoes(self.works, embargoes)
-        self.file_sets = self.add_embargoes(self.file_sets, embargoes)
-        permissions = list(store.query(self.acl_query))
-        self.works = self.add_acls(self.works, permissions)
-        self.file_sets = self.add_acls(self.file_sets, permissions)
+        # Embargoes and ACLs are applied to works and filesets in a single pass over each query's results (resources are updated in place)
+        resources = self.works + self.file_sets
+        self.add_embargoes(resources, store.query(self.embargo_query))
+        self.add_acls(resources, store.query(self.acl_query))
         self.file_sets = self.retrieve_derivatives(self.file_sets, store)
 
 
@@ -462,7 +457,7 @@ class MigrationDiff:
         """Compute difference between original and migreated works"""
         for f4_work in self.f4_works:
             model = f4_work.data["model"]
-            bulkrax_id = f4_work.id.split("/")[-1]
+            bulkrax_id = f4_work.id.rpartition("/")[2]
             work = self.ids_to_bulkrax.get(bulkrax_id)
             try:
                 assert work, "Matching Work Not Found"
@@ -507,7 +502,7 @@ class MigrationDiff:
     def diff_file_sets(self):
         """Computes differences between original and migrated file sets"""
         for f4_fs in self.f4_file_sets:
-            parent_id = f4_fs.parents.split("/")[-1]
+            parent_id = f4_fs.parents.rpartition("/")[2]
             title = f4_fs.title
             original_id = (
                 f4_fs.id,
@@ -633,7 +628,7 @@ class MigrationDiff:
             c["key"][len(base_path) : len(c["key"]) - len(suffix)]: c["checksum"]
             for c in h5_checksums
         }
-        checksum_diff = [c for c in self.run_checksums(path_to_zips, zip_file_pattern)]
+        checksum_diff = list(self.run_checksums(path_to_zips, zip_file_pattern))
         for zip_file, checksums in checksum_diff:
             for checksum in checksums:
                 try:
@@ -684,12 +679,11 @@ class MigrationDiff:
             with ZipFile(zip_file) as zf:
                 with zf.open(f"{zip_file.stem}.csv") as f:
                     reader = DictReader(TextIOWrapper(f))
-                    rows = [r for r in reader]
-                    files_to_check = [
+                    files_to_check = (
                         {"file": r["title"], "parent": r["parents"]}
-                        for r in rows
+                        for r in reader
                         if r["model"] == "FileSet"
-                    ]
+                    )
                     checksums = []
                     for file in files_to_check:
                         fs = self.file_set_lookup.get((file["file"], file["parent"]))
@@ -0,0 +1,57 @@
+import os
+import shutil
+from pathlib import Path
+from tempfile import mkdtemp
+from zipfile import ZipFile
+
+import pytest
+
+TESTS_DIR = Path(__file__).parent
+
+
+def extract_cached(request, tmp_path_factory, archive: str) -> Path:
+    """
+    Extract a test archive under pytest's cache directory, keyed on the archive's
+    size and mtime, so that repeated sessions reuse the extracted files. Falls back
+    to a fresh temporary directory when the cache plugin is disabled.
+    """
+    path_to_zip = TESTS_DIR / archive
+    cache = getattr(request.config, "cache", None)
+    if cache is None:
+        path_to_extract = tmp_path_factory.mktemp(path_to_zip.stem)
+        with ZipFile(path_to_zip) as zf:
+            zf.extractall(path=path_to_extract)
+        return path_to_extract
+    stat = path_to_zip.stat()
+    cache_dir = Path(cache.mkdir(path_to_zip.stem))
+    path_to_extract = cache_dir / f"{stat.st_size}-{stat.st_mtime_ns}"
+    if not path_to_extract.exists():
+        # Extract alongside and rename into place, so that concurrent sessions never
+        # see a partial extraction
+        path_to_tmp = Path(mkdtemp(prefix=".tmp-", dir=cache_dir))
+        with ZipFile(path_to_zip) as zf:
+            zf.extractall(path=path_to_tmp)
+        try:
+            os.replace(path_to_tmp, path_to_extract)
+        except OSError:
+            # Another session finished first
+            shutil.rmtree(path_to_tmp)
+    return path_to_extract
+
+
+@pytest.fixture(scope="session")
+def fcrepo_graph(request, tmp_path_factory):
+    return extract_cached(request, tmp_path_factory, "fcrepo-graph.zip")
+
+
+@pytest.fixture(scope="session")
+def fcrepo_export(request, tmp_path_factory):
+    return (
+        extract_cached(request, tmp_path_factory, "fedora-4.7.5-export.zip")
+        / "fedora-4.7.5-export"
+    )
+
+
+@pytest.fixture(scope="session")
+def output_path(tmp_path_factory):
+    return tmp_path_factory.mktemp("bulkrax_output")
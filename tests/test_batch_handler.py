@@ -1,5 +1,3 @@
-from collections import defaultdict
-
 import pytest
 
 from pytools.utils import BatchHandler
@@ -42,15 +40,15 @@ def filesets(fileset, resources):
 
 
 @pytest.fixture()
-def handler():
+def handler(tmp_path):
     def _copy_files_mock(batch_id, files):
         return [(batch_id, fs.name) for fs in files]
 
-    handler = BatchHandler(
-        batch_size=5, formatter=lambda x: x, output_path="./", path_to_root=""
-    )
-    handler._copy_files = _copy_files_mock
-    return handler
+    with BatchHandler(
+        batch_size=5, formatter=lambda x: x, output_path=tmp_path, path_to_root=""
+    ) as handler:
+        handler._copy_files = _copy_files_mock
+        yield handler
 
 
 def test_batches(handler, filesets, resources):
@@ -99,14 +97,12 @@ def test_batches_done(handler, filesets, resources):
     br = handler.current_batch()
     assert len(br.rows) == 5, "Should not release more rows than max batch size"
     assert len(br.files_copied) == 5, "Should not copy more files than max batch size"
-    for fileset in filesets[4:9]:
-        assert fileset.name in [f[1] for f in br.files_copied], (
-            "Should contain all filesets from released batch"
-        )
+    assert {fileset.name for fileset in filesets[4:9]} <= {
+        f[1] for f in br.files_copied
+    }, "Should contain all filesets from released batch"
     # Batch 2
     br = handler.current_batch()
     assert len(br.rows) == 4, "Should release remainder"
-    for fileset in filesets[9:13]:
-        assert fileset.name in [f[1] for f in br.files_copied], (
-            "Should contain all filesets from released batch"
-        )
+    assert {fileset.name for fileset in filesets[9:13]} <= {
+        f[1] for f in br.files_copied
+    }, "Should contain all filesets from released batch"
@@ -1,27 +1,22 @@
-from itertools import chain, islice
-from os import listdir
+from copy import deepcopy
+from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from re import L
-from zipfile import ZipFile
+from shutil import copytree
 
 import pytest
-from more_itertools import before_and_after
-from pyoxigraph import Literal, NamedNode
+from pyoxigraph import Literal, NamedNode, Quad, parse
 
 from pytools.fcrepo_to_bulkrax import (
     Collection,
     FedoraGraph,
     FileSet,
     Work,
-    is_active_embargo,
 )
 from pytools.mappings import (
     EmbargoMapping,
-    ParentChildMapping,
-    PermissionsMapping,
 )
 from pytools.utils import (
-    is_active_embargo,
     uri_to_id,
 )
 
@@ -35,27 +30,6 @@ def id_to_uri(_id):
     return f"http://localhost:8984/rest/prod/{_id[:2]}/{_id[2:4]}/{_id[4:6]}/{_id[6:8]}/{_id}"
 
 
-@pytest.fixture(scope="session")
-def fcrepo_graph(tmp_path_factory):
-    path_to_graph = tmp_path_factory.mktemp("fcrepo_graph")
-    with ZipFile("./tests/fcrepo-graph.zip") as zf:
-        zf.extractall(path=path_to_graph)
-    return path_to_graph
-
-
-@pytest.fixture(scope="session")
-def fcrepo_export(tmp_path_factory):
-    path_to_export = tmp_path_factory.mktemp("fcrepo_export")
-    with ZipFile("./tests/fedora-4.7.5-export.zip") as zf:
-        zf.extractall(path=path_to_export)
-    return Path(path_to_export) / "fedora-4.7.5-export"
-
-
-@pytest.fixture(scope="session")
-def output_path(tmp_path_factory):
-    return tmp_path_factory.mktemp("bulkrax_output")
-
-
 @pytest.fixture(scope="session")
 def change_set_path(tmp_path_factory):
     path_to_change_set = Path(tmp_path_factory.mktemp("change_set")) / "change_set.csv"
@@ -65,32 +39,32 @@ def change_set_path(tmp_path_factory):
     return path_to_change_set
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def a_fileset_id():
     return "http://localhost:8984/rest/prod/0r/96/73/72/0r967372b"
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def a_work_id():
     return "http://localhost:8984/rest/prod/6t/05/3f/96/6t053f96k"
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def a_file_uri():
     return "http://localhost:8984/rest/prod/0r/96/73/72/0r967372b/files/970d6269-194c-4448-ab23-37aa0027ffe3"
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def a_filename(a_fileset_id):
     return "TestWordDoc.doc"
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def another_filename(a_fileset_id):
     return "Test Word Doc.doc"
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def a_fileset_result(a_fileset_id, a_work_id, a_file_uri, a_filename):
     return {
         "fileset": NamedNode(a_fileset_id),
@@ -100,7 +74,7 @@ def a_fileset_result(a_fileset_id, a_work_id, a_file_uri, a_filename):
     }
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def another_fileset_result(a_fileset_id, a_work_id, a_file_uri, another_filename):
     return {
         "fileset": NamedNode(a_fileset_id),
@@ -110,248 +84,26 @@ def another_fileset_result(a_fileset_id, a_work_id, a_file_uri, another_filename
     }
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def a_collection_id():
     return "http://localhost:8984/rest/prod/j6/73/13/76/j67313767"
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def a_collection_result():
+    # Triples on the collection, in the shape of the resources query's solutions
+    admin_set = NamedNode(
+        "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
+    )
     return [
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://schema.org/keywords"),
-            "o": Literal("Keyword Collection 1"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode(
-                "http://fedora.info/definitions/v4/repository#lastModifiedBy"
-            ),
-            "o": Literal("bypassAdmin"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://fedora.info/definitions/v4/repository#hasParent"),
-            "o": NamedNode("http://localhost:8984/rest/prod"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://purl.org/dc/elements/1.1/creator"),
-            "o": Literal("Author, Collection 1"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://purl.org/dc/terms/alternative"),
-            "o": Literal("Collection 1 Alt Title"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://purl.org/dc/elements/1.1/description"),
-            "o": Literal("Collection 1 Text"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://www.w3.org/1999/02/22-rdf-syntax-ns#type"),
-            "o": NamedNode("http://projecthydra.org/works/models#Collection"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://www.w3.org/1999/02/22-rdf-syntax-ns#type"),
-            "o": NamedNode("http://www.w3.org/ns/ldp#RDFSource"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://www.w3.org/1999/02/22-rdf-syntax-ns#type"),
-            "o": NamedNode("http://fedora.info/definitions/v4/repository#Container"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://www.w3.org/1999/02/22-rdf-syntax-ns#type"),
-            "o": NamedNode("http://www.w3.org/ns/ldp#Container"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://www.w3.org/1999/02/22-rdf-syntax-ns#type"),
-            "o": NamedNode("http://pcdm.org/models#Collection"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://www.w3.org/1999/02/22-rdf-syntax-ns#type"),
-            "o": NamedNode("http://fedora.info/definitions/v4/repository#Resource"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://purl.org/dc/elements/1.1/subject"),
-            "o": Literal("Subject 1 Collection 1"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://purl.org/dc/elements/1.1/subject"),
-            "o": Literal("Subject 2 Collection 1"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://www.w3.org/2000/01/rdf-schema#seeAlso"),
-            "o": Literal("https://library.gwu.edu/collection1"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://purl.org/dc/elements/1.1/publisher"),
-            "o": Literal("Publisher, Collection 1"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://purl.org/dc/terms/title"),
-            "o": Literal("Collection 1"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://purl.org/dc/terms/identifier"),
-            "o": Literal("coll_1"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://schema.org/additionalType"),
-            "o": Literal("gid://scholarspace/Hyrax::CollectionType/2"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://purl.org/dc/terms/created"),
-            "o": Literal("2025"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://fedora.info/definitions/v4/repository#createdBy"),
-            "o": Literal("bypassAdmin"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://purl.org/dc/elements/1.1/contributor"),
-            "o": Literal("Contributor, Collection 1"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("info:fedora/fedora-system:def/model#hasModel"),
-            "o": Literal("Collection"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://id.loc.gov/vocabulary/relators/dpt"),
-            "o": Literal("admin@example.com"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://purl.org/dc/terms/type"),
-            "o": Literal("Journal"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://purl.org/dc/elements/1.1/language"),
-            "o": Literal("en"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://purl.org/dc/terms/license"),
-            "o": Literal("http://creativecommons.org/publicdomain/zero/1.0/"),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
-        {
-            "s": NamedNode("http://localhost:8984/rest/prod/j6/73/13/76/j67313767"),
-            "p": NamedNode("http://www.w3.org/ns/auth/acl#accessControl"),
-            "o": NamedNode(
-                "http://localhost:8984/rest/prod/cb/7e/9b/e6/cb7e9be6-76a9-474c-bca9-2feb927ec3b4"
-            ),
-            "adminSet": NamedNode(
-                "http://localhost:8984/rest/prod/ad/mi/n_/se/admin_set/default"
-            ),
-        },
+        {"s": q.subject, "p": q.predicate, "o": q.object, "adminSet": admin_set}
+        for q in parse(path=Path(__file__).parent / "collection-1.nt")
     ]
 
 
 @pytest.fixture(scope="session")
 def graph(request, fcrepo_graph, fcrepo_export, output_path, change_set_path):
-    fg = FedoraGraph(
+    with FedoraGraph(
         path_to_graph=fcrepo_graph / "fcrepo-graph",
         path_to_root=fcrepo_export,
         path_to_mapping="./fedora_bulkrax_mapping.csv",
@@ -362,16 +114,16 @@ def graph(request, fcrepo_graph, fcrepo_export, output_path, change_set_path):
         change_set=change_set_path,
         field_defaults={"creator": "The George Washington University"},
         batch_size=5,
-    )
-    return fg
+    ) as fg:
+        yield fg
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def collection_ids():
     return ["j67313767", "j6731377h"]
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def work_ids():
     return [
         "02870v844",
@@ -394,7 +146,7 @@ def work_ids():
     ]
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def single_values():
     return [
         ("title", "Work 1"),
@@ -416,12 +168,12 @@ def single_values():
     ]
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def multi_values():
     return [("keyword", ["Keyword 1", "Keyword 2"])]
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def parents_children():
     return {
         "j67313767": ["rf55z768s", "9s1616164", "7w62f8209"],
@@ -430,7 +182,7 @@ def parents_children():
     }
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def permissions():
     return {
         "cj82k728n": "authenticated",
@@ -443,7 +195,7 @@ def permissions():
     }
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def embargos():
     return {
         "2v23vt362": ("authenticated", "2026-12-17", "open"),
@@ -452,19 +204,40 @@ def embargos():
     }
 
 
-@pytest.fixture()
-def works(graph):
+# The graph is read once per session; tests that update resources in place get their own copies
+@pytest.fixture(scope="session")
+def graph_works(graph):
     return list(graph.get_resources(Work))
 
 
+@pytest.fixture(scope="session")
+def graph_filesets(graph):
+    return list(graph.get_filesets())
+
+
 @pytest.fixture()
+def works(graph_works):
+    return deepcopy(graph_works)
+
+
+@pytest.fixture(scope="session")
 def collections(graph):
     return list(graph.get_resources(Collection))
 
 
 @pytest.fixture()
-def filesets(graph):
-    return list(graph.get_filesets())
+def filesets(graph_filesets):
+    return deepcopy(graph_filesets)
+
+
+@pytest.fixture(scope="session")
+def permissioned(graph, graph_works, graph_filesets):
+    # Works and filesets with permissions applied; tests that update them further
+    # should copy them first
+    return [
+        graph.permissions.update_resource(resource)
+        for resource in deepcopy(graph_works + graph_filesets)
+    ]
 
 
 def test_fileset(
@@ -488,6 +261,15 @@ def test_fileset(
     assert fs.file == f"{uri_to_id(a_fileset_id)}_{another_filename.replace(' ', '')}"
 
 
+def test_uri_to_id(a_fileset_id, a_work_id):
+    assert uri_to_id(a_fileset_id) == a_fileset_id.split("/")[-1]
+    assert uri_to_id([a_fileset_id, a_work_id]) == [
+        a_fileset_id.split("/")[-1],
+        a_work_id.split("/")[-1],
+    ]
+    assert uri_to_id("no-slashes") == "no-slashes"
+
+
 def test_collection(graph, a_collection_id, a_collection_result):
     collection = Collection.make_resource(
         a_collection_id, a_collection_result, graph.mapping
@@ -505,13 +287,63 @@ def test_collection(graph, a_collection_id, a_collection_result):
     assert "depositor" not in collection.data
 
 
-def test_load_resources(works, collections, collection_ids, work_ids):
-    assert len(collections) == 2
-    assert len(works) == 17
-    for work in works:
-        assert work.id.split("/")[-1] in work_ids
-    for collection in collections:
-        assert collection.id.split("/")[-1] in collection_ids
+@pytest.mark.parametrize(
+    "resources,ids", [("graph_works", "work_ids"), ("collections", "collection_ids")]
+)
+def test_load_resources(request, resources, ids):
+    resources = request.getfixturevalue(resources)
+    expected = set(request.getfixturevalue(ids))
+    assert len(resources) == len(expected)
+    assert {uri_to_id(resource.id) for resource in resources} == expected
+
+
+def test_in_memory_graph(
+    fcrepo_graph, fcrepo_export, output_path, change_set_path, works, collections
+):
+    fg = FedoraGraph(
+        path_to_graph=fcrepo_graph / "fcrepo-graph",
+        path_to_root=fcrepo_export,
+        path_to_mapping="./fedora_bulkrax_mapping.csv",
+        output_path=output_path,
+        admin_set="Default Admin Set",
+        models="GwWork,GwEtd,GwJournalIssue",
+        change_set=change_set_path,
+        in_memory=True,
+    )
+    assert [w.id for w in fg.get_resources(Work)] == [w.id for w in works]
+    assert [c.id for c in fg.get_resources(Collection)] == [c.id for c in collections]
+
+
+def test_query_cache(
+    tmp_path, fcrepo_graph, fcrepo_export, output_path, change_set_path, works
+):
+    def make_graph(path_to_graph=fcrepo_graph / "fcrepo-graph"):
+        return FedoraGraph(
+            path_to_graph=path_to_graph,
+            path_to_root=fcrepo_export,
+            path_to_mapping="./fedora_bulkrax_mapping.csv",
+            output_path=output_path,
+            admin_set="Default Admin Set",
+            models="GwWork,GwEtd,GwJournalIssue",
+            change_set=change_set_path,
+            query_cache=tmp_path / "query_cache",
+        )
+
+    first = make_graph()
+    assert [w.data for w in first.get_resources(Work)] == [w.data for w in works]
+    cached = list((tmp_path / "query_cache").glob("*.pickle"))
+    # Permissions and embargos, and works
+    assert len(cached) == 2
+    # A second run reads the saved results
+    second = make_graph()
+    assert second.attributes == first.attributes
+    assert [w.data for w in second.get_resources(Work)] == [w.data for w in works]
+    assert len(list((tmp_path / "query_cache").glob("*.pickle"))) == 2
+    # A copy of the graph elsewhere, with the same timestamps, doesn't share them
+    copy_of_graph = copytree(fcrepo_graph / "fcrepo-graph", tmp_path / "graph_copy")
+    copied = make_graph(copy_of_graph)
+    assert [w.data for w in copied.get_resources(Work)] == [w.data for w in works]
+    assert len(list((tmp_path / "query_cache").glob("*.pickle"))) == 4
 
 
 def test_value_types(works, single_values, multi_values):
@@ -522,57 +354,99 @@ def test_value_types(works, single_values, multi_values):
         assert work.data.get(field) == value
 
 
-def test_memberships(graph, works, parents_children):
-    works = [graph.parents.update_resource(work) for work in works]
-    work_dict = {work.id.split("/")[-1]: work for work in works}
+def test_memberships(works, parents_children):
+    work_dict = {uri_to_id(work.id): work for work in works}
     for parent, children in parents_children.items():
         for child in children:
             assert child in work_dict
-            assert parent in [
-                p.split("/")[-1] for p in work_dict[child].data.get("parents", [])
-            ]
+            assert parent in uri_to_id(work_dict[child].data.get("parents", []))
+
+
+def test_memberships_merge_relations(
+    fcrepo_graph, fcrepo_export, output_path, change_set_path
+):
+    fg = FedoraGraph(
+        path_to_graph=fcrepo_graph / "fcrepo-graph",
+        path_to_root=fcrepo_export,
+        path_to_mapping="./fedora_bulkrax_mapping.csv",
+        output_path=output_path,
+        admin_set="Default Admin Set",
+        models="GwWork,GwEtd,GwJournalIssue",
+        change_set=change_set_path,
+        in_memory=True,
+    )
+    # The child is listed under one parent by hasMember in the test graph; give it another by memberOf
+    child, parent = id_to_uri("k643b116n"), id_to_uri("v979v304g")
+    other_parent = id_to_uri("j6731377h")
+    fg.store.add(
+        Quad(
+            NamedNode(child),
+            NamedNode(FedoraGraph.MEMBERSHIP_CHILD),
+            NamedNode(other_parent),
+        )
+    )
+    work = next(w for w in fg.get_resources(Work) if w.id == child)
+    assert sorted(work.data["parents"]) == sorted([parent, other_parent])
 
 
-def test_permissions(graph, works, filesets, permissions):
+def test_permissions(permissioned, permissions):
     count = 0
-    works = [graph.permissions.update_resource(work) for work in works]
-    filesets = [graph.permissions.update_resource(fileset) for fileset in filesets]
-    for resource in works + filesets:
+    for resource in permissioned:
         if hasattr(resource, "data"):
             data = resource.data
         else:
             data = resource.__dict__
-        r_id = resource.id.split("/")[-1]
-        if r_id in permissions:
-            count += 1
-            assert data["visibility"] == permissions[r_id]
-        else:
-            assert data["visibility"] == "open"
+        r_id = uri_to_id(resource.id)
+        count += r_id in permissions
+        assert data["visibility"] == permissions.get(r_id, "open")
 
     assert count == len(permissions)
 
 
-def test_embargos(graph, works, filesets, embargos):
-    works = [graph.permissions.update_resource(work) for work in works]
-    filesets = [graph.permissions.update_resource(fileset) for fileset in filesets]
-    works = [graph.embargos.update_resource(work) for work in works]
-    filesets = [graph.embargos.update_resource(fileset) for fileset in filesets]
-
-    for resource in works + filesets:
+def test_embargos(graph, permissioned, embargos):
+    for resource in map(graph.embargos.update_resource, deepcopy(permissioned)):
         if hasattr(resource, "data"):
             data = resource.data
         else:
             data = resource.__dict__
-        r_id = resource.id.split("/")[-1]
-        if r_id in embargos:
+        embargo = embargos.get(uri_to_id(resource.id))
+        if embargo is None:
+            assert data["visibility"] != "embargo"
+        else:
             assert data["visibility"] == "embargo"
             assert (
                 data["visibility_during_embargo"],
                 data["embargo_release_date"],
                 data["visibility_after_embargo"],
-            ) == embargos[r_id]
-        else:
-            assert data["visibility"] != "embargo"
+            ) == embargo
+
+
+def test_embargo_release(a_work_id):
+    results = [
+        {
+            "resource": NamedNode(a_work_id),
+            "visibilityDuringEmbargo": Literal("restricted"),
+            "visibilityAfterEmbargo": Literal("open"),
+            "releaseDate": Literal("2026-12-31T00:00:00Z"),
+        }
+    ]
+    before = EmbargoMapping().make_mapping(results, now=datetime(2026, 1, 1))
+    assert before.embargo_per_resource[a_work_id] == {
+        "visibility_during_embargo": "restricted",
+        "visibility_after_embargo": "open",
+        "embargo_release_date": "2026-12-31",
+        "visibility": "embargo",
+    }
+    after = EmbargoMapping().make_mapping(results, now=datetime(2027, 1, 1))
+    assert after.embargo_per_resource[a_work_id] == {"visibility": "open"}
+
+
+def test_fused_attributes(graph, works):
+    for work in works:
+        expected = Work(id=work.id, admin_set=work.admin_set)
+        for mapping in (graph.permissions, graph.embargos):
+            mapping.update_resource(expected)
+        assert graph.attributes.get(work.id, {}) == expected.data
 
 
 def test_ordering(works, filesets, collections):
@@ -590,23 +464,38 @@ def test_change_set(works, graph):
     assert not works[0].data["keyword"]
 
 
+def test_pipe_delimited(graph):
+    assert graph.pipe_delimited == frozenset(
+        ["license", "rights_statement", "doi", "related_url"]
+    )
+    row = graph.format_for_bulkrax(
+        {
+            "id": "http://localhost:8984/rest/prod/6t/05/3f/96/6t053f96k",
+            "license": ["License 1", "License 2"],
+            "rights": ["Rights 1", "Rights 2"],  # Substring of a pipe-delimited field
+        }
+    )
+    assert row["license"] == "License 1|License 2"
+    assert row["rights"] == "Rights 1; Rights 2"
+
+
 def test_bulkrax_rows_order(graph):
-    already_seen = []  # track ID's that might appear as parents
+    already_seen = set()  # track ID's that might appear as parents
     for i, batch in enumerate(graph.prepare_import_batches()):
         if i == 0:
             assert {r["model"] for r in batch.rows[:2]} == {"Collection"}, (
                 "Collections should be emitted first"
             )
         rows = batch.rows
-        already_seen.extend(
-            [row["bulkrax_identifier"] for row in rows if row["model"] != "FileSet"]
+        already_seen.update(
+            row["bulkrax_identifier"] for row in rows if row["model"] != "FileSet"
         )
         file_parents = [row["parents"] for row in rows if row["model"] == "FileSet"]
         assert len(file_parents) == len(set(file_parents)), (
             "Should emit only one file_set per parent per batch"
         )
         assert all(
-            [row["parents"] in already_seen for row in rows if "parents" in row]
+            row["parents"] in already_seen for row in rows if "parents" in row
         ), "All references to parents should refer to works already emitted"
         batch.save_zip()
     assert (
@@ -1,3 +1,4 @@
+from operator import itemgetter
 from random import shuffle
 
 import pytest
@@ -35,21 +36,21 @@ def works_with_parents():
 
 
 def test_queue_unique_items(all_unique):
-    q = StaggeredQueue(lambda x: x[0])
+    q = StaggeredQueue(itemgetter(0))
     for item in all_unique:
         q.add(item)
-    consumed = [item for item in q]
+    consumed = list(q)
     assert len(consumed) == 26
     assert len({c[0] for c in consumed}) == len(consumed)
 
 
 def test_queue_repeated_attrs(repeated_attributes):
     all_consumed = []
-    q = StaggeredQueue(lambda x: x[0])
+    q = StaggeredQueue(itemgetter(0))
     for item in repeated_attributes:
         q.add(item)
     for _ in range(26):
-        consumed = [item for item in q.take(10)]
+        consumed = list(q.take(10))
         assert len(consumed) <= 10
         assert len({c[0] for c in consumed}) == len(consumed)
         all_consumed.extend(consumed)
@@ -60,16 +61,19 @@ def test_queue_repeated_attrs(repeated_attributes):
 
 
 def test_child_queue(parents, works_with_parents):
-    q = ChildQueue(attr_func=lambda x: x["parents"])
+    q = ChildQueue(attr_func=itemgetter("parents"))
     for p in parents:
         assert not q.stored(p)
     for w in works_with_parents:
         assert q.stored(w)
     some_parents = {p["work"] for p in parents[:10]}
-    children = [w for w in q.get_children(some_parents)]
+    children = list(q.get_children(some_parents))
     assert len(children) == 10
     assert {p for c in children for p in c["parents"]} == some_parents
     assert len(q.children) == 16
     other_parents = {p["work"] for p in parents[10:15]}
-    other_children = [w for w in q.take(other_parents, 5)]
+    other_children = list(q.take(other_parents, 5))
     assert {p for c in other_children for p in c["parents"]} == other_parents
+    assert len(q.children) == 11, (
+        "Children taken at the batch boundary should be removed"
+    )